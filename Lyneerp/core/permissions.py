@@ -30,18 +30,12 @@ def _request_tenant(request):
     """
     Retourne l'objet Tenant attaché à la requête (via le middleware).
 
-    Si rien n'a été posé, on tente une résolution paresseuse.
+    ``None`` posé par le middleware fait foi (pas de nouvelle résolution) ;
+    hors middleware, le résolveur mémorise son résultat sur la requête.
     """
     from Lyneerp.core.tenant import resolve_tenant_from_request
 
-    tenant = getattr(request, "tenant", None)
-    if tenant is None:
-        tenant = resolve_tenant_from_request(request)
-        try:
-            request.tenant = tenant
-        except Exception:  # pragma: no cover - request peut être immutable
-            pass
-    return tenant
+    return resolve_tenant_from_request(request)
 
 
 def _user_is_platform_admin(user) -> bool:
@@ -10,33 +10,234 @@ au lieu de réimplémenter leur propre logique.
 """
 from __future__ import annotations
 
+import base64
+import hashlib
 import logging
 import re
-from typing import Optional
-from uuid import UUID
-
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import orjson
+from cachetools import TLRUCache
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Value, When
 from django.http import HttpRequest
 
 logger = logging.getLogger(__name__)
 
 TENANT_HEADER = "HTTP_X_TENANT_ID"
+# Alias accepté (déjà envoyé par certains clients finance) ; X-Tenant-Id prime.
+TENANT_SLUG_HEADER = "HTTP_X_TENANT_SLUG"
+# Les motifs sont appliqués avec ``re.match`` sur un hôte déjà en minuscules :
+# ancrés en début d'hôte, ils ne couvrent l'hôte entier que s'ils finissent
+# par ``$`` (un motif « préfixe » comme le défaut reste accepté).
 DEFAULT_TENANT_SUBDOMAIN_REGEX = r"^(?P<tenant>[a-z0-9-]+)\."
+# Motif de production (settings.base) : traité sans regex, cf. _lyneerp_subdomain.
+LYNEERP_SUBDOMAIN_REGEX = r"^(?P<tenant>[a-z0-9-]+)\.(?:rh\.)?lyneerp\.com$"
+# Variantes d'ancrage, dont la forme sans ancres documentée un temps dans
+# ``.env.example`` : toutes traitées comme l'hôte entier par le fast path.
+_LYNEERP_PATTERNS = frozenset(
+    f"{start}{LYNEERP_SUBDOMAIN_REGEX[1:-1]}{end}" for start in ("", "^") for end in ("", "$")
+)
+LYNEERP_HOST_SUFFIX = ".lyneerp.com"
+# Motifs « sous-domaine + domaine littéral » (ex. ``…\.lyneerp\.test``) :
+# reconnus par _literal_host_suffix et appliqués par simple ``endswith``.
+_TENANT_LABEL_PREFIX = r"(?P<tenant>[a-z0-9-]+)\."
+_TENANT_LABEL_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789-"
+
+# Colonnes chargées par le résolveur : ``request.tenant`` n'a besoin que de
+# l'identité (dont ``domain``, clé de cache relue par
+# ``invalidate_tenant_cache``), du statut et du plan (permissions / UI), pas
+# des blocs facturation / branding / JSON (``settings``, ``bank_details``…).
+#
+# Projection commune aux deux sources de ``request.tenant`` (identifiant
+# résolu et membership, cf. _resolve_user_primary_tenant). Consommateurs
+# audités : templates (``current_tenant.name``), context processor, filtres
+# tenant et permissions ne lisent que ces colonnes. Tout champ hors liste
+# coûte un SELECT par accès : les documents (identité légale, facturation,
+# branding) rechargent la ligne complète, comme ``invoice_pdf`` via
+# ``select_related("tenant")``. Ajouter ici une colonne lue à chaque requête.
+TENANT_RESOLVE_FIELDS = ("id", "slug", "name", "domain", "is_active", "plan_type")
+
+# Les settings ne changent pas à chaud : lu une fois à l'import plutôt qu'à
+# chaque requête via le ``LazySettings``.
+_DEFAULT_TENANT = getattr(settings, "DEFAULT_TENANT", None)
+TENANT_SESSION_KEY = getattr(settings, "TENANT_SESSION_KEY", "current_tenant")
+_SESSION_COOKIE_NAME = settings.SESSION_COOKIE_NAME
+_TENANT_CLAIM = getattr(settings, "KEYCLOAK_TENANT_CLAIM", "tenant")
+# Pré-filtre ``str.endswith`` avant la regex de sous-domaine (vide = aucun).
+_TENANT_HOST_SUFFIXES = tuple(
+    suffix.lower() for suffix in getattr(settings, "TENANT_HOST_SUFFIXES", ()) or ()
+)
+
+_IPV4_MATCH = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$").match
+# Formes acceptées par ``UUIDField`` en pratique : canonique ou 32 hexa.
+_UUID_FULLMATCH = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32}",
+    re.IGNORECASE,
+).fullmatch
+
+
+def token_cache_key(token: str) -> bytes:
+    """
+    Clé compacte pour indexer un token dans un cache en mémoire du process.
 
+    BLAKE2b sur 8 octets : plus rapide que SHA-256 sur des entrées courtes,
+    et le ``bytes`` brut sert directement de clé de dict (pas de hexdigest).
+    Encodage sans perte : aucun caractère n'est ignoré, deux tokens
+    distincts ne partagent pas une entrée.
+    """
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
 
-def _is_uuid(value: str) -> bool:
-    try:
-        UUID(str(value))
-        return True
-    except (ValueError, AttributeError, TypeError):
-        return False
 
+def _canonical_uuid(value: str) -> Optional[str]:
+    """
+    Forme canonique ``str(UUID)`` (minuscules, tirets) si ``value`` est un
+    UUID accepté, sinon None.
+
+    Majuscules et 32 hexa désignent la même ligne : une seule forme sert à
+    la recherche et à la clé de cache, que l'invalidation (``str(pk)``)
+    atteint donc toujours.
+    """
+    # Regex plutôt que ``UUID(value)`` seul : un slug ou un domaine (cas
+    # courant) ne coûte pas une exception levée puis rattrapée.
+    if _UUID_FULLMATCH(value) is None:
+        return None
+    return str(uuid.UUID(value))
+
+
+@lru_cache(maxsize=8)
+def _subdomain_match(pattern: str):
+    """
+    ``match`` lié du motif compilé, mémorisé par motif (les settings
+    peuvent changer en tests).
+    """
+    # Pas de re.IGNORECASE : l'hôte est normalisé en minuscules en amont.
+    # re.ASCII : un nom d'hôte est ASCII (IDN en punycode).
+    return re.compile(pattern, re.ASCII).match
+
+
+def _is_tenant_label(label: str) -> bool:
+    # Équivalent exact de ``[a-z0-9-]+`` sans passer par le moteur de regex.
+    return bool(label) and not label.strip(_TENANT_LABEL_CHARS)
+
+
+@lru_cache(maxsize=8)
+def _literal_host_suffix(pattern: str) -> Optional[str]:
+    """
+    Suffixe d'hôte (``.lyneerp.test``) si ``pattern`` s'écrit
+    ``(?P<tenant>[a-z0-9-]+)\\.<domaine littéral échappé>$`` (``^`` toléré).
+
+    None pour tout autre motif, dont ceux sans ``$`` (correspondance de
+    préfixe) : l'appelant applique alors la regex.
+    """
+    if not pattern.endswith("$"):
+        return None
+    body = pattern[:-1]
+    if body.startswith("^"):
+        body = body[1:]
+    if not body.startswith(_TENANT_LABEL_PREFIX):
+        return None
+    labels = body[len(_TENANT_LABEL_PREFIX):].split(r"\.")
+    if not all(_is_tenant_label(label) for label in labels):
+        return None
+    return "." + ".".join(labels)
+
+
+def _lyneerp_subdomain(host: str) -> Optional[str]:
+    """
+    Équivalent de ``LYNEERP_SUBDOMAIN_REGEX`` par simple découpage de chaîne
+    (``acme.lyneerp.com`` / ``acme.rh.lyneerp.com`` → ``acme``).
+
+    ``host`` doit déjà être en minuscules et sans port. Renvoie None si la
+    forme n'est pas reconnue, exactement comme la regex ancrée.
+    """
+    if not host.endswith(LYNEERP_HOST_SUFFIX):
+        return None
+    head = host[: -len(LYNEERP_HOST_SUFFIX)]
+    if head.endswith(".rh"):
+        head = head[:-3]
+    return head if _is_tenant_label(head) else None
+
+
+def existing_session(request: HttpRequest):
+    """
+    Renvoie ``request.session`` seulement si le client a présenté un cookie
+    de session.
+
+    Sans cookie, la session est forcément vide : on évite de la matérialiser
+    (et de solliciter le backend de session) pour les appels API stateless
+    qui portent déjà ``X-Tenant-Id``.
+    """
+    session = getattr(request, "session", None)
+    if session is None:
+        return None
+    if _SESSION_COOKIE_NAME not in request.COOKIES:
+        return None
+    return session
+
+
+def _normalize_host(host: str) -> str:
+    return host.split(":", 1)[0].lower().strip()
+
+
+def request_host(request: HttpRequest) -> str:
+    """
+    Nom d'hôte normalisé (minuscules, sans port) de la requête.
+
+    ``get_host()`` relit les headers et revalide ``ALLOWED_HOSTS`` à chaque
+    appel : le résultat est mémorisé sur la requête pour que middleware,
+    résolveur et logs le partagent.
+    """
+    host = getattr(request, "_tenant_host", None)
+    if host is None:
+        host = _normalize_host(request.get_host()) if hasattr(request, "get_host") else ""
+        request._tenant_host = host
+    return host
+
+
+def _subdomain_pattern() -> str:
+    # Relu à chaque appel : les tests surchargent TENANT_SUBDOMAIN_REGEX.
+    return getattr(settings, "TENANT_SUBDOMAIN_REGEX", DEFAULT_TENANT_SUBDOMAIN_REGEX)
 
-def _subdomain_regex() -> re.Pattern[str]:
-    pattern = getattr(
-        settings, "TENANT_SUBDOMAIN_REGEX", DEFAULT_TENANT_SUBDOMAIN_REGEX
-    )
-    return re.compile(pattern, re.IGNORECASE)
+
+def _match_subdomain(host: str, pattern: str) -> Optional[str]:
+    # ``host`` déjà normalisé ; un hôte sans point ne porte pas de sous-domaine.
+    if "." not in host:
+        return None
+    if _TENANT_HOST_SUFFIXES and not host.endswith(_TENANT_HOST_SUFFIXES):
+        return None
+
+    if pattern in _LYNEERP_PATTERNS:
+        # Équivalent exact de la forme ancrée : pas de repli sur la regex.
+        return _lyneerp_subdomain(host)
+
+    suffix = _literal_host_suffix(pattern)
+    if suffix is not None:
+        if not host.endswith(suffix):
+            return None
+        head = host[: -len(suffix)]
+        return head if _is_tenant_label(head) else None
+
+    match = _subdomain_match(pattern)(host)
+    if match:
+        return match.group("tenant")
+    return None
+
+
+def match_tenant_subdomain(host: str) -> Optional[str]:
+    """
+    Applique uniquement ``TENANT_SUBDOMAIN_REGEX`` au nom d'hôte (sans le
+    repli « premier label » d'``infer_tenant_from_host``).
+    """
+    if not host:
+        return None
+    return _match_subdomain(_normalize_host(host), _subdomain_pattern())
 
 
 def infer_tenant_from_host(host: str) -> Optional[str]:
@@ -47,63 +248,247 @@ def infer_tenant_from_host(host: str) -> Optional[str]:
     """
     if not host:
         return None
+    return _infer_tenant_from_normalized_host(_normalize_host(host), _subdomain_pattern())
+
 
-    host = host.split(":", 1)[0].lower().strip()
-    if host in {"localhost", "127.0.0.1", "::1", "0.0.0.0"}:
+@lru_cache(maxsize=1024)
+def _infer_tenant_from_normalized_host(host: str, pattern: str) -> Optional[str]:
+    """
+    Fonction pure (hôte normalisé, motif) → indice : les hôtes servis sont
+    peu nombreux, la regex ne tourne qu'une fois par hôte et par motif.
+    """
+    # localhost & co : pas de point, donc jamais de regex pour le trafic dev.
+    if "." not in host or host in {"127.0.0.1", "0.0.0.0"}:
         return None
-    if re.match(r"^\d{1,3}(\.\d{1,3}){3}$", host):
+    if _IPV4_MATCH(host):
         return None
 
-    match = _subdomain_regex().match(host)
-    if match:
-        return match.group("tenant")
+    tenant = _match_subdomain(host, pattern)
+    if tenant:
+        return tenant
+    return host.split(".", 1)[0]
 
-    if "." not in host:
+
+# --------------------------------------------------------------------------- #
+# Indice tenant porté par un Bearer JWT
+# --------------------------------------------------------------------------- #
+BEARER_HINT_TTL = 300  # secondes, borné en plus par ``exp``
+_BEARER_PREFIX = "Bearer "
+_BEARER_PREFIX_LEN = len(_BEARER_PREFIX)
+
+
+def _bearer_ttu(_key, value, now):
+    # Un token n'est pas gardé au-delà de son ``exp`` (ni de BEARER_HINT_TTL).
+    return min(value[1], now + BEARER_HINT_TTL)
+
+
+# token_cache_key(token) → (indice, expiration timestamp)
+_BEARER_HINT_CACHE = TLRUCache(maxsize=10000, ttu=_bearer_ttu, timer=time.time)
+# Les caches cachetools ne sont pas thread-safe (serveur threadé) ; le
+# décodage du token reste hors verrou.
+_BEARER_HINT_LOCK = threading.Lock()
+
+
+def _peek_claims(token: str) -> dict:
+    """
+    Payload d'un JWT compact, sans vérification ni lecture de l'en-tête.
+
+    Lève ``ValueError`` (base64, JSON, forme ``header.payload.sig``) si le
+    token est illisible ou si le payload n'est pas un objet JSON.
+    """
+    _, payload, _ = token.split(".", 2)
+    payload += "=" * (-len(payload) % 4)
+    claims = orjson.loads(base64.urlsafe_b64decode(payload))
+    if not isinstance(claims, dict):
+        raise ValueError("payload JWT inattendu")
+    return claims
+
+
+def _extract_tenant_from_token(token: str) -> Tuple[Optional[str], float]:
+    """
+    Lit (sans vérifier la signature) l'indice tenant d'un JWT et son ``exp``.
+
+    La signature est vérifiée plus tard par la couche d'authentification ;
+    ici il ne s'agit que d'un indice, au même titre que ``X-Tenant-Id``.
+    """
+    now = time.time()
+    try:
+        claims = _peek_claims(token)
+    except ValueError:
+        return None, now + BEARER_HINT_TTL
+
+    hint = claims.get(_TENANT_CLAIM) or claims.get("tenant") or claims.get("tenant_id")
+    try:
+        exp = float(claims.get("exp") or now + BEARER_HINT_TTL)
+    except (TypeError, ValueError):
+        exp = now + BEARER_HINT_TTL
+    return (str(hint) if hint else None), exp
+
+
+def _from_bearer(request: HttpRequest) -> Optional[str]:
+    """
+    Indice tenant du header ``Authorization: Bearer <jwt>``.
+
+    Le décodage est mis en cache par token (clé BLAKE2b) : un même token
+    rejoué sur de nombreuses requêtes n'est décodé qu'une fois.
+    """
+    auth = request.META.get("HTTP_AUTHORIZATION", "")
+    if len(auth) <= _BEARER_PREFIX_LEN or not auth.startswith(_BEARER_PREFIX):
         return None
-    return host.split(".", 1)[0]
+    token = auth[_BEARER_PREFIX_LEN:].strip()
+    if not token:
+        return None
+
+    key = token_cache_key(token)
+    with _BEARER_HINT_LOCK:
+        entry = _BEARER_HINT_CACHE.get(key)
+    if entry is None:
+        entry = _extract_tenant_from_token(token)
+        if entry[1] > time.time():
+            with _BEARER_HINT_LOCK:
+                _BEARER_HINT_CACHE[key] = entry
+    return entry[0]
+
+
+# --------------------------------------------------------------------------- #
+# Cache des résolutions identifiant → Tenant
+# --------------------------------------------------------------------------- #
+TENANT_CACHE_TTL = 300
+# Les identifiants inconnus sont aussi mémorisés, moins longtemps, pour ne
+# pas re-interroger la base à chaque requête portant un mauvais indice.
+TENANT_CACHE_MISS_TTL = 30
+_CACHE_MISS = "__MISS__"
+_MISSING = object()
+# ``settings.TENANT_CACHE_ENABLE = False`` : chaque résolution va en base
+# (diagnostic, ou cache partagé indisponible entre workers).
+_TENANT_CACHE_ENABLE = getattr(settings, "TENANT_CACHE_ENABLE", True)
+
+
+def tenant_cache_key(identifier: str) -> str:
+    return f"tenant:hint:{identifier}"
+
+
+def _normalize_identifier(value: str) -> str:
+    """
+    Forme unique d'un identifiant tenant, partagée par la résolution (clé de
+    cache et recherche) et par l'invalidation : sans espaces, UUID canonique.
+
+    Slug et domaine sont comparés tels quels en base (sensibles à la casse) :
+    ils ne sont pas passés en minuscules, sans quoi deux recherches
+    distinctes partageraient une même clé.
+    """
+    value = value.strip()
+    return _canonical_uuid(value) or value
+
+
+def invalidate_tenant_cache(tenant) -> None:
+    """
+    Oublie les résolutions en cache d'un tenant (UUID, slug, domaine).
+
+    Branché sur ``post_save`` / ``post_delete`` de ``Tenant`` (cf.
+    ``tenants.signals``) ; à appeler aussi après un ``QuerySet.update()``.
+    La suppression a lieu au commit de la transaction en cours.
+    """
+    invalidate_tenants_cache([(tenant.pk, tenant.slug, getattr(tenant, "domain", ""))])
+
+
+def invalidate_tenants_cache(rows) -> None:
+    """
+    Variante par lot : ``rows`` est un itérable de ``(pk, slug, domain)``,
+    typiquement ``queryset.values_list("pk", "slug", "domain")`` lu avant un
+    ``update()``. Un seul ``delete_many`` (un aller-retour Redis) pour tout
+    le lot.
+
+    Différé via ``transaction.on_commit`` (immédiat hors transaction) : une
+    suppression avant le commit laisserait une autre requête remettre en
+    cache l'ancienne ligne, encore visible d'elle jusqu'au commit.
+    """
+    keys = set()
+    for ident in rows:
+        for value in ident:
+            value = _normalize_identifier(str(value or ""))
+            if value:
+                keys.add(tenant_cache_key(value))
+    if keys:
+        keys = list(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _lookup_tenant(Tenant, value: str):
+    """
+    UUID : lecture directe par clé primaire (cas courant, la session et le
+    middleware stockent l'UUID). Sinon, ou si l'UUID est inconnu : un seul
+    SELECT pour slug et domaine.
+
+    Si plusieurs tenants correspondent (slug de l'un = domaine d'un autre),
+    la priorité reste id → slug → domaine.
+    """
+    qs = Tenant.objects.only(*TENANT_RESOLVE_FIELDS)
+    # Seulement si la valeur est un UUID (déjà canonique, cf. _safe_resolve) :
+    # Postgres rejette sinon le cast.
+    if _UUID_FULLMATCH(value) is not None:
+        try:
+            return qs.get(pk=value)
+        except Tenant.DoesNotExist:
+            pass
+
+    return (
+        qs
+        .filter(Q(slug=value) | Q(domain=value))
+        .annotate(_match_rank=Case(
+            When(slug=value, then=Value(0)), default=Value(1), output_field=IntegerField(),
+        ))
+        .order_by("_match_rank", "pk")
+        .first()
+    )
+
+
+@lru_cache(maxsize=1)
+def _tenant_model():
+    """
+    Modèle ``Tenant``, importé au premier appel (pas au chargement du module :
+    import circulaire avec ``tenants``) puis mémorisé.
+    """
+    from tenants.models import Tenant
+
+    return Tenant
 
 
 def _safe_resolve(identifier: Optional[str]):
     """
-    Importation locale pour éviter l'import circulaire au chargement Django.
+    Résout un identifiant brut (UUID, slug, domaine) en ``Tenant``.
+
+    Le résultat (y compris « introuvable ») est mis en cache par identifiant,
+    sauf si ``settings.TENANT_CACHE_ENABLE`` est faux.
     """
     if not identifier:
         return None
+    value = _normalize_identifier(str(identifier))
+    if not value:
+        return None
+
+    if _TENANT_CACHE_ENABLE:
+        key = tenant_cache_key(value)
+        cached = cache.get(key)
+        if cached is not None:
+            return None if cached == _CACHE_MISS else cached
+
     try:
-        from tenants.models import Tenant
+        Tenant = _tenant_model()
     except Exception:  # noqa: BLE001
         logger.exception("tenants app not loaded yet")
         return None
 
-    value = str(identifier).strip()
-    if not value:
-        return None
+    tenant = _lookup_tenant(Tenant, value)
 
-    if _is_uuid(value):
-        tenant = Tenant.objects.filter(id=value).only("id", "slug", "name", "is_active").first()
-        if tenant:
-            return tenant
-
-    tenant = (
-        Tenant.objects
-        .filter(slug=value)
-        .only("id", "slug", "name", "is_active")
-        .first()
-    )
-    if tenant:
+    if not _TENANT_CACHE_ENABLE:
         return tenant
-
-    if hasattr(Tenant, "domain"):
-        tenant = (
-            Tenant.objects
-            .filter(domain=value)
-            .only("id", "slug", "name", "is_active")
-            .first()
-        )
-        if tenant:
-            return tenant
-
-    return None
+    if tenant is None:
+        cache.set(key, _CACHE_MISS, TENANT_CACHE_MISS_TTL)
+    else:
+        tenant.id_str  # noqa: B018 — calculé avant pickling, servi tel quel ensuite
+        cache.set(key, tenant, TENANT_CACHE_TTL)
+    return tenant
 
 
 def resolve_tenant(identifier: Optional[str]):
@@ -124,74 +509,126 @@ def _resolve_user_primary_tenant(request: HttpRequest):
     - le user n'est pas authentifié,
     - aucune membership active n'existe,
     - l'app ``tenants`` n'est pas chargée.
+
+    Comme pour les autres sources, seules ``TENANT_RESOLVE_FIELDS`` sont
+    chargées (champs différés au-delà).
     """
     user = getattr(request, "user", None)
     if user is None or not getattr(user, "is_authenticated", False):
         return None
     try:
-        from tenants.models import TenantUser
+        Tenant = _tenant_model()
     except Exception:  # noqa: BLE001
         return None
 
-    membership = (
-        TenantUser.objects
-        .filter(user=user, is_active=True, tenant__is_active=True)
-        .select_related("tenant")
-        .order_by("-last_access", "-joined_at")
+    # Une seule requête sur ``tenants`` (jointure membership) plutôt qu'un
+    # select_related qui ramène la ligne TenantUser + le Tenant complet.
+    return (
+        Tenant.objects
+        .filter(
+            is_active=True,
+            tenant_users__user=user,
+            tenant_users__is_active=True,
+        )
+        .order_by("-tenant_users__last_access", "-tenant_users__joined_at")
+        .only(*TENANT_RESOLVE_FIELDS)
         .first()
     )
-    if membership and membership.tenant:
-        return membership.tenant
-    return None
+
+
+# --------------------------------------------------------------------------- #
+# Sources d'indice tenant, dans l'ordre de priorité
+# --------------------------------------------------------------------------- #
+def _hint_from_header(request: HttpRequest) -> Optional[str]:
+    # ``request.headers`` n'est qu'une vue sur META : une seule source suffit.
+    meta = request.META
+    return meta.get(TENANT_HEADER) or meta.get(TENANT_SLUG_HEADER)
+
+
+def _hint_from_session(request: HttpRequest) -> Optional[str]:
+    # Seulement si le client a déjà une session (pas de chargement à vide).
+    session = existing_session(request)
+    if session is None:
+        return None
+    get = session.get
+    return get("tenant_id") or get(TENANT_SESSION_KEY)
+
+
+def _hint_from_host(request: HttpRequest) -> Optional[str]:
+    host = request_host(request)  # déjà normalisé
+    if not host:
+        return None
+    return _infer_tenant_from_normalized_host(host, _subdomain_pattern())
+
+
+def _hint_from_claims(request: HttpRequest) -> Optional[str]:
+    # Session OIDC (``request.oidc``), sinon claim du Bearer JWT.
+    oidc = getattr(request, "oidc", None) or {}
+    if isinstance(oidc, dict):
+        ident = oidc.get("tenant") or oidc.get("tenant_id")
+        if ident:
+            return ident
+    return _from_bearer(request)
+
+
+# Chaque extracteur renvoie un identifiant brut (UUID, slug, domaine) ou None ;
+# ``resolve_tenant_from_request`` s'arrête au premier qui se résout.
+_HINT_EXTRACTORS = (
+    _hint_from_header,
+    _hint_from_session,
+    _hint_from_host,
+    _hint_from_claims,
+)
 
 
 def resolve_tenant_from_request(request: HttpRequest):
     """
     Ordre de résolution :
 
-      1. ``request.tenant`` déjà posé par un middleware
-      2. Header ``X-Tenant-Id`` (UUID ou slug)
+      1. ``request.tenant`` déjà posé par un middleware (même ``None`` : la
+         résolution n'est faite qu'une fois par requête)
+      2. Header ``X-Tenant-Id`` (UUID ou slug), sinon ``X-Tenant-Slug``
       3. Session ``tenant_id`` (ou ``settings.TENANT_SESSION_KEY``)
       4. Sous-domaine selon ``TENANT_SUBDOMAIN_REGEX``
-      5. Claims OIDC ``request.oidc.tenant`` / ``tenant_id``
+      5. Claims OIDC ``request.oidc.tenant`` / ``tenant_id``, sinon claim
+         tenant du ``Authorization: Bearer`` (non vérifié, mis en cache)
       6. ``TenantUser`` du user authentifié (mono-tenant : sa seule org)
       7. ``settings.DEFAULT_TENANT`` (slug ou UUID)
     """
     if request is None:
         return None
 
-    cached = getattr(request, "tenant", None)
-    if cached is not None:
-        return cached
-
-    # 2) Header HTTP
-    ident = (
-        request.META.get(TENANT_HEADER)
-        or request.headers.get("X-Tenant-Id")
-    )
-    tenant = _safe_resolve(ident)
-    if tenant:
-        return tenant
-
-    # 3) Session
-    if hasattr(request, "session"):
-        session_key = getattr(settings, "TENANT_SESSION_KEY", "current_tenant")
-        ident = request.session.get("tenant_id") or request.session.get(session_key)
-        tenant = _safe_resolve(ident)
-        if tenant:
-            return tenant
-
-    # 4) Host
-    host = request.get_host() if hasattr(request, "get_host") else ""
-    ident = infer_tenant_from_host(host)
-    tenant = _safe_resolve(ident)
-    if tenant:
-        return tenant
-
-    # 5) OIDC claims
-    oidc = getattr(request, "oidc", None) or {}
-    if isinstance(oidc, dict):
-        ident = oidc.get("tenant") or oidc.get("tenant_id")
+    # ``TenantMiddleware`` a déjà tranché (y compris « aucun tenant ») :
+    # permissions, managers et viewsets réutilisent ce résultat.
+    if hasattr(request, "tenant"):
+        return request.tenant
+
+    # Hors middleware (requête DRF enveloppée, tests, tâches) : mémo sur la
+    # requête, sentinelle pour que « aucun tenant » soit aussi mémorisé.
+    tenant = getattr(request, "_resolved_tenant", _MISSING)
+    if tenant is _MISSING:
+        tenant = _resolve_from_sources(request)
+        try:
+            request._resolved_tenant = tenant
+        except AttributeError:  # pragma: no cover - objet requête figé
+            pass
+    return tenant
+
+
+def _resolve_from_sources(request: HttpRequest):
+    """Étapes 2 → 7 de ``resolve_tenant_from_request``, sans mémo."""
+    # 2) → 5) : premier indice qui désigne un tenant existant. Un même
+    # identifiant (ex. header et sous-domaine « acme ») n'est résolu qu'une
+    # fois : un échec ne coûte pas d'autre aller-retour cache / base.
+    seen = set()
+    for extract in _HINT_EXTRACTORS:
+        ident = extract(request)
+        if not ident:
+            continue
+        ident = str(ident).strip()
+        if not ident or ident in seen:
+            continue
+        seen.add(ident)
         tenant = _safe_resolve(ident)
         if tenant:
             return tenant
@@ -202,11 +639,12 @@ def resolve_tenant_from_request(request: HttpRequest):
         return tenant
 
     # 7) Default
-    ident = getattr(settings, "DEFAULT_TENANT", None)
-    return _safe_resolve(ident)
+    if _DEFAULT_TENANT in seen:
+        return None
+    return _safe_resolve(_DEFAULT_TENANT)
 
 
 def get_tenant_id(request: HttpRequest) -> Optional[str]:
     """Retourne l'UUID stringifié du tenant courant ou None."""
     tenant = getattr(request, "tenant", None) or resolve_tenant_from_request(request)
-    return str(tenant.id) if tenant else None
+    return tenant.id_str if tenant else None
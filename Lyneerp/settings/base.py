@@ -273,6 +273,8 @@ if REDIS_URL:
             },
         }
     }
+    # Sessions lues depuis Redis (la base n'est relue qu'en cas de miss) :
+    # le tenant en session ne coûte pas de SELECT par requête.
     SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
     SESSION_CACHE_ALIAS = "default"
 else:
@@ -282,6 +284,8 @@ else:
             "LOCATION": "lyneerp-default",
         }
     }
+    # Pas de cached_db sur LocMem : cache propre à chaque worker, une session
+    # invalidée (logout) resterait servie par les autres process.
     SESSION_ENGINE = "django.contrib.sessions.backends.db"
 
 # --------------------------------------------------------------------------- #
@@ -337,11 +341,20 @@ SPECTACULAR_SETTINGS = {
 # Multi-tenant
 # --------------------------------------------------------------------------- #
 TENANT_SESSION_KEY = "current_tenant"
+# Appliqué avec ``re.match`` sur l'hôte en minuscules (sans port) : finir
+# par ``$`` pour couvrir l'hôte entier, sinon correspondance de préfixe.
 TENANT_SUBDOMAIN_REGEX = os.getenv(
     "TENANT_SUBDOMAIN_REGEX",
     r"^(?P<tenant>[a-z0-9-]+)\.(?:rh\.)?lyneerp\.com$",
 )
+# Suffixes d'hôte que TENANT_SUBDOMAIN_REGEX peut reconnaître (ex.
+# ".lyneerp.com"). Si renseigné, les autres hôtes (sondes, IP, domaines
+# annexes) ne passent pas par la regex. Vide = pas de pré-filtre.
+TENANT_HOST_SUFFIXES = env_list("TENANT_HOST_SUFFIXES")
 DEFAULT_TENANT = os.getenv("DEFAULT_TENANT") or None
+# Cache des résolutions identifiant → Tenant (UUID / slug / domaine), 5 min,
+# invalidé sur save/delete d'un Tenant.
+TENANT_CACHE_ENABLE = env_bool("TENANT_CACHE_ENABLE", True)
 LICENSE_ENFORCEMENT = env_bool("LICENSE_ENFORCEMENT", False)
 
 # --- Provisioning tenant via SSO Keycloak ---------------------------------- #
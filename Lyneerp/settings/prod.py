@@ -89,3 +89,13 @@ if "sqlite" in DATABASES["default"]["ENGINE"]:  # noqa: F405
         file=sys.stderr,
     )
     raise RuntimeError("DB_ENGINE=postgres requis en production.")
+
+# Sans Redis : sessions en base (un SELECT par requête authentifiée) et caches
+# LocMem par worker (résolutions tenant invalidées dans un seul process).
+# ``cached_db`` exige un cache partagé : pas de repli LocMem.
+if not REDIS_URL:  # noqa: F405
+    print(
+        "[LYNEERP] WARN: REDIS_URL absent en production — sessions en base, "
+        "caches locaux au process.",
+        file=sys.stderr,
+    )
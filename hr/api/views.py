@@ -76,7 +76,7 @@ from hr.api.serializers import (
     MedicalRestrictionSerializer, PayrollSerializer, RecruitmentAnalyticsSerializer, JobOfferSerializer,
     RecruitmentWorkflowSerializer, InterviewFeedbackSerializer, EmploymentContractExportSerializer,
 )
-from tenants.models import Tenant, TenantDomain, TenantUser
+from tenants.models import Tenant, TenantUser
 
 # Services (export, etc.)
 try:
@@ -103,58 +103,22 @@ def get_current_tenant_from_request(request: HttpRequest) -> Optional[Tenant]:
     return resolve_tenant_from_request(request)
 
 
-def _legacy_get_current_tenant_from_request(request: HttpRequest) -> Optional[Tenant]:
-    # Conservée comme référence — l'algorithme initial multi-source. Ne plus
-    # appeler directement.
-
-    # 1) Via OIDC (si tu ajoutes oidc au request)
-    oidc = getattr(request, "oidc", {}) or {}
-    raw = oidc.get("tenant") or oidc.get("tenant_id")
-    if raw:
-        # slug
-        t = Tenant.objects.filter(slug=raw).first()
-        if t:
-            return t
-        # UUID
-        try:
-            uuid_val = uuid.UUID(str(raw))
-            t = Tenant.objects.filter(id=uuid_val).first()
-            if t:
-                return t
-        except ValueError:
-            pass
-
-    # 2) Header X-Tenant-Id
-    hdr = request.headers.get("X-Tenant-Id") or request.META.get("HTTP_X_TENANT_ID")
-    if hdr:
-        t = Tenant.objects.filter(slug=hdr).first()
-        if t:
-            return t
-        try:
-            uuid_val = uuid.UUID(str(hdr))
-            t = Tenant.objects.filter(id=uuid_val).first()
-            if t:
-                return t
-        except ValueError:
-            pass
-
-    # 3) Par le host
-    host = request.get_host().split(":")[0].lower()
-
-    # 3.a) TenantDomain direct
-    dom = TenantDomain.objects.filter(domain=host).select_related("tenant").first()
-    if dom:
-        return dom.tenant
+def _active_tenant_from_header(request: HttpRequest):
+    """
+    ``(valeur brute, tenant actif)`` pour le header ``X-Tenant-Id``.
 
-    # 3.b) Sous-domaine -> slug
-    parts = host.split(".")
-    if len(parts) >= 3:
-        sub = parts[0]
-        t = Tenant.objects.filter(slug=sub).first()
-        if t:
-            return t
+    La valeur (slug, UUID ou domaine) passe par le résolveur unique et son
+    cache ; ``(None, None)`` si le header est absent.
+    """
+    from Lyneerp.core.tenant import TENANT_HEADER, resolve_tenant
 
-    return None
+    raw = str(request.META.get(TENANT_HEADER) or "").strip()
+    if not raw:
+        return None, None
+    tenant = resolve_tenant(raw)
+    if tenant is not None and not tenant.is_active:
+        tenant = None
+    return raw, tenant
 
 
 # -----------------------------
@@ -178,20 +142,15 @@ class BaseTenantViewSet(viewsets.ModelViewSet):
 
     # ---- Résolution du tenant ----------------------------------------------
     def get_tenant(self):
+        # ``request.tenant`` du middleware (même ``None``) fait foi ; hors
+        # middleware, le résolveur mémorise son résultat sur la requête.
         from Lyneerp.core.tenant import resolve_tenant_from_request
 
-        tenant = getattr(self.request, "tenant", None)
-        if tenant is None:
-            tenant = resolve_tenant_from_request(self.request)
-            try:
-                self.request.tenant = tenant
-            except Exception:  # request peut être immuable
-                pass
-        return tenant
+        return resolve_tenant_from_request(self.request)
 
     def get_tenant_id(self):
         tenant = self.get_tenant()
-        return str(tenant.id) if tenant else None
+        return tenant.id_str if tenant else None
 
     # ---- Filtrage queryset --------------------------------------------------
     def _scope_legacy_tenant_id(self, qs, tenant):
@@ -900,19 +859,8 @@ class EmployeeViewSet(BaseTenantViewSet, viewsets.ModelViewSet):
             return {"tenant": req_tenant}
 
         # 2) Header X-Tenant-Id (slug OU UUID)
-        raw = request.headers.get("X-Tenant-Id") or request.META.get("HTTP_X_TENANT_ID")
+        raw, tenant = _active_tenant_from_header(request)
         if raw:
-            raw = str(raw).strip()
-            tenant = None
-
-            # a) Essayer comme UUID (id)
-            try:
-                uuid.UUID(raw)
-                tenant = Tenant.objects.filter(id=raw, is_active=True).first()
-            except ValueError:
-                # b) Sinon, on considère que c’est un slug
-                tenant = Tenant.objects.filter(slug=raw, is_active=True).first()
-
             if tenant is None:
                 raise serializers.ValidationError(
                     {"tenant": f"Tenant introuvable pour « {raw} »."}
@@ -982,16 +930,8 @@ class EmployeeViewSet(BaseTenantViewSet, viewsets.ModelViewSet):
             return req_tenant
 
         # 2) Header X-Tenant-Id (slug ou UUID)
-        raw = request.headers.get("X-Tenant-Id") or request.META.get("HTTP_X_TENANT_ID")
+        raw, tenant = _active_tenant_from_header(request)
         if raw:
-            raw = str(raw).strip()
-            tenant = None
-            try:
-                uuid.UUID(raw)
-                tenant = Tenant.objects.filter(id=raw, is_active=True).first()
-            except ValueError:
-                tenant = Tenant.objects.filter(slug=raw, is_active=True).first()
-
             if tenant is None:
                 raise serializers.ValidationError(
                     {"tenant": f"Tenant introuvable pour « {raw} »."}
@@ -1198,27 +1138,14 @@ class RecruitmentStatsView(APIView):
         if tenant:
             return tenant
 
-        raw = request.headers.get("X-Tenant-Id") or request.META.get("HTTP_X_TENANT_ID")
-        if not raw:
-            return None
-
-        raw = str(raw).strip()
-
-        # slug d'abord
-        t = Tenant.objects.filter(slug=raw, is_active=True).first()
-        if t:
-            return t
-
-        # uuid ensuite
-        try:
-            uuid.UUID(raw)
-        except ValueError:
-            raise ValidationError({"tenant": f"'{raw}' n'est ni un slug, ni un UUID valide."})
-
-        t = Tenant.objects.filter(id=raw, is_active=True).first()
-        if not t:
-            return None
-        return t
+        raw, tenant = _active_tenant_from_header(request)
+        if raw and tenant is None:
+            # UUID inconnu : pas de data (200 vide) ; valeur malformée : 400.
+            try:
+                uuid.UUID(raw)
+            except ValueError:
+                raise ValidationError({"tenant": f"'{raw}' n'est ni un slug, ni un UUID valide."})
+        return tenant
 
     def get(self, request, *args, **kwargs):
         tenant = self._get_tenant(request)
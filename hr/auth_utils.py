@@ -43,4 +43,20 @@ def ensure_seat_for_user(tenant: Tenant, module: str, user_sub: str, user_email:
         user_email=user_email or "",
         active=True,
         activated_at=timezone.now(),
-    )
\ No newline at end of file
+    )
+
+
+def sync_user_profile(user, **fields) -> dict:
+    """
+    Aligne les champs profil (email, prénom, nom) sur les claims SSO.
+
+    Un seul ``UPDATE`` ciblé, et uniquement pour les champs non vides qui
+    diffèrent : aucune requête si rien n'a changé, pas de ``save()`` complet
+    (ni signaux pre_save/post_save).
+    """
+    updates = {f: v for f, v in fields.items() if v and getattr(user, f) != v}
+    if updates:
+        type(user).objects.filter(pk=user.pk).update(**updates)
+        for f, v in updates.items():
+            setattr(user, f, v)
+    return updates
@@ -21,7 +21,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .auth import KeycloakJWTAuthentication
-from .auth_utils import ensure_seat_for_user
+from .auth_utils import ensure_seat_for_user, sync_user_profile
 from tenants.models import TenantUser
 
 logger = logging.getLogger(__name__)
@@ -52,22 +52,12 @@ class ExchangeTokenView(APIView):
         first = claims.get("given_name") or ""
         last = claims.get("family_name") or ""
 
-        user, _created = User.objects.get_or_create(
+        user, created = User.objects.get_or_create(
             username=username,
             defaults={"email": email or "", "first_name": first, "last_name": last},
         )
-        update_fields = []
-        if email and user.email != email:
-            user.email = email
-            update_fields.append("email")
-        if first and user.first_name != first:
-            user.first_name = first
-            update_fields.append("first_name")
-        if last and user.last_name != last:
-            user.last_name = last
-            update_fields.append("last_name")
-        if update_fields:
-            user.save(update_fields=update_fields)
+        if not created:
+            sync_user_profile(user, email=email, first_name=first, last_name=last)
 
         # Validation tenant
         tenant = getattr(request, "tenant", None)
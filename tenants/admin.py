@@ -4,6 +4,7 @@ from django.db.models import Count, Q
 from django.utils import timezone
 from django.utils.html import format_html
 
+from Lyneerp.core.tenant import invalidate_tenants_cache
 from tenants.models import License, SeatAssignment, Tenant, TenantService, TenantSubscription, TenantSettings, \
     TenantActivityLog, TenantBilling, TenantInvitation, TenantDomain, TenantUser
 
@@ -46,13 +47,11 @@ def license_is_valid(lic: License) -> bool:
 
 
 def license_assigned_seats(lic: License) -> int:
-    return SeatAssignment.objects.filter(
-        tenant=lic.tenant, module=lic.module, active=True
-    ).count()
+    return lic.used_seats
 
 
 def license_available_seats(lic: License) -> int:
-    return max(lic.seats - license_assigned_seats(lic), 0)
+    return lic.available_seats
 
 
 # -- License admin -----------------------------------------------------------------
@@ -118,8 +117,8 @@ class TenantAdmin(admin.ModelAdmin):
     )
 
     def get_queryset(self, request):
-        # adapte le related_name si ton TenantUser s'appelle autrement
-        return super().get_queryset(request).prefetch_related("tenant_users")
+        # COUNT des membres actifs annoté en une requête pour toute la liste.
+        return super().get_queryset(request).with_stats()
 
     # ----- Badges UI -----
     def plan_badge(self, obj: Tenant):
@@ -136,8 +135,9 @@ class TenantAdmin(admin.ModelAdmin):
     plan_badge.short_description = "Plan"
 
     def trial_badge(self, obj: Tenant):
-        if obj.is_in_trial:
-            days_left = max((obj.trial_ends_at - timezone.now()).days, 0)
+        now = timezone.now()
+        if obj.is_in_trial(now):
+            days_left = max((obj.trial_ends_at - now).days, 0)
             return format_html('<span style="color:#d97706;">⏰ Essai ({} j)</span>', days_left)
         return format_html('<span style="color:#6b7280;">—</span>')
     trial_badge.short_description = "Essai"
@@ -148,12 +148,19 @@ class TenantAdmin(admin.ModelAdmin):
 
     # ----- Actions -----
     def activate_tenants(self, request, queryset):
+        # update() court-circuite post_save : on purge le cache de résolution.
+        # Identifiants lus AVANT l'update : relire le queryset ensuite peut ne
+        # plus rien renvoyer (changelist filtrée sur is_active).
+        idents = list(queryset.values_list("pk", "slug", "domain"))
         updated = queryset.update(is_active=True)
+        invalidate_tenants_cache(idents)
         self.message_user(request, f"{updated} tenant(s) activé(s).")
     activate_tenants.short_description = "Activer"
 
     def deactivate_tenants(self, request, queryset):
+        idents = list(queryset.values_list("pk", "slug", "domain"))
         updated = queryset.update(is_active=False)
+        invalidate_tenants_cache(idents)
         self.message_user(request, f"{updated} tenant(s) désactivé(s).")
     deactivate_tenants.short_description = "Désactiver"
 
@@ -274,10 +281,11 @@ class TenantServiceAdmin(admin.ModelAdmin):
     service_display.short_description = "Service"
 
     def is_expired_display(self, obj):
-        if obj.is_expired:
+        now = timezone.now()
+        if obj.is_expired(now):
             return format_html('<span style="color: red;">⚠️ Expiré</span>')
         elif obj.expires_at:
-            days = obj.days_until_expiry
+            days = obj.days_until_expiry(now)
             if days and days < 7:
                 return format_html('<span style="color: orange;">{} jours</span>', days)
             return format_html('<span style="color: green;">{} jours</span>', days)
@@ -286,7 +294,7 @@ class TenantServiceAdmin(admin.ModelAdmin):
     is_expired_display.short_description = "Expiration"
 
     def days_until_expiry_display(self, obj):
-        days = obj.days_until_expiry
+        days = obj.days_until_expiry()
         if days is None:
             return "Aucune date d'expiration"
         return f"{days} jours"
@@ -311,10 +319,11 @@ class TenantInvitationAdmin(admin.ModelAdmin):
     actions = ["resend_invitations", "revoke_invitations"]
 
     def is_expired_display(self, obj):
-        if obj.is_expired:
+        now = timezone.now()
+        if obj.is_expired(now):
             return format_html('<span style="color: red;">✗ Expirée</span>')
         else:
-            days_left = (obj.expires_at - timezone.now()).days
+            days_left = (obj.expires_at - now).days
             return format_html('<span style="color: green;">✓ Valide ({}j)</span>', days_left)
 
     is_expired_display.short_description = "Validité"
@@ -558,9 +567,9 @@ class LicenseAdmin(admin.ModelAdmin):
     is_valid_col.short_description = "Statut"
 
     def get_queryset(self, request):
-        # Optimisation
+        # Optimisation : tenant joint et sièges annotés (pas de COUNT par ligne)
         qs = super().get_queryset(request)
-        return qs.select_related('tenant')
+        return qs.select_related('tenant').with_seat_usage()
 
 
 # -- SeatAssignment admin ----------------------------------------------------------
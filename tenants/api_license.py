@@ -18,19 +18,15 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import License, SeatAssignment, Tenant
+from .utils import resolve_tenant
 
 logger = logging.getLogger(__name__)
 DEFAULT_MODULE = "rh"
 
 
 def _resolve_tenant(identifier: str | None):
-    if not identifier:
-        return None
-    return (
-        Tenant.objects
-        .filter(slug=identifier).first()
-        or Tenant.objects.filter(id=identifier).first()
-    )
+    # Résolveur unique (UUID / slug / domaine) — plus de copie locale.
+    return resolve_tenant(identifier)
 
 
 def _license_status_payload(
@@ -46,13 +42,8 @@ def _license_status_payload(
         and lic.valid_until
         and lic.valid_until >= today
     )
-    seats_used = (
-        SeatAssignment.objects
-        .filter(tenant=tenant, module=module, active=True)
-        .count()
-        if active
-        else 0
-    )
+    # ``lic`` vient de ``with_seat_usage()`` : compteur déjà annoté.
+    seats_used = lic.used_seats if active else 0
     user_entitled = False
     if active and user_sub:
         user_entitled = SeatAssignment.objects.filter(
@@ -99,6 +90,7 @@ class LicenseStatusView(APIView):
 
         lic = (
             License.objects
+            .with_seat_usage()
             .filter(tenant=tenant, module=module)
             .order_by("-valid_until")
             .first()
@@ -137,6 +129,7 @@ class LicenseClaimSeatView(APIView):
 
         lic = (
             License.objects
+            .with_seat_usage()
             .filter(tenant=tenant, module=module)
             .order_by("-valid_until")
             .first()
@@ -167,6 +160,7 @@ class LicenseClaimSeatView(APIView):
                 "activated_at": timezone.now(),
             },
         )
-        # On recompte après l'insertion.
+        # On recompte après l'insertion : le compteur annoté est périmé.
+        lic = License.objects.with_seat_usage().get(pk=lic.pk)
         new_payload = _license_status_payload(lic, tenant, module, user_sub)
         return Response(new_payload)
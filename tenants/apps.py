@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tenants'
+
+    def ready(self) -> None:
+        # Invalidation du cache de résolution tenant sur save/delete
+        from tenants import signals  # noqa: F401
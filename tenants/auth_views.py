@@ -14,44 +14,50 @@ Sécurité :
 """
 from __future__ import annotations
 
-import json
 import logging
-import re
+import threading
 from typing import Optional
 
-import requests
+import orjson
+from cachetools import TTLCache
 from django.conf import settings
 from django.contrib.auth import get_user_model, login as dj_login, logout as dj_logout
 from django.http import HttpRequest, JsonResponse
 from django.shortcuts import redirect
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST
-from jose import jwt as jose_jwt
 
-from hr.auth_utils import ensure_seat_for_user
 from tenants.models import Tenant, TenantUser
-from tenants.utils import resolve_tenant
+from tenants.utils import (
+    existing_session,
+    match_tenant_subdomain,
+    request_host,
+    resolve_tenant,
+)
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 TENANT_COOKIE_KEY = getattr(settings, "TENANT_SESSION_KEY", "current_tenant")
 
+# Timeout Keycloak (connexion, lecture) en secondes.
+KEYCLOAK_HTTP_TIMEOUT = (3, 9)
+_KC_HTTP = None
+
+# (username, realm) → pk : évite le get_or_create sur les re-logins rapprochés.
+_USER_ID_CACHE = TTLCache(maxsize=5000, ttl=60)
+# Les caches cachetools ne sont pas thread-safe (serveur threadé).
+_USER_ID_LOCK = threading.Lock()
+# Colonnes nécessaires au login (hash de session, contrôle superuser, profil).
+_LOGIN_USER_FIELDS = (
+    "id", "username", "password", "email", "first_name", "last_name",
+    "is_superuser", "is_active",
+)
+
 
 # --------------------------------------------------------------------------- #
 # Helpers
 # --------------------------------------------------------------------------- #
-def _subdomain_re() -> re.Pattern[str]:
-    return re.compile(
-        getattr(
-            settings,
-            "TENANT_SUBDOMAIN_REGEX",
-            r"^(?P<tenant>[a-z0-9-]+)\.(?:rh\.)?lyneerp\.com$",
-        ),
-        re.IGNORECASE,
-    )
-
-
 def _extract_next(request: HttpRequest, body: dict) -> str:
     nxt = request.GET.get("next") or request.POST.get("next") or body.get("next")
     return nxt or getattr(settings, "LOGIN_REDIRECT_URL", "/")
@@ -64,17 +70,17 @@ def _infer_tenant(request: HttpRequest, provided: Optional[str]) -> Optional[str
     """
     if provided:
         return str(provided).strip()
-    hdr = request.headers.get("X-Tenant-Id")
+    hdr = request.META.get("HTTP_X_TENANT_ID")
     if hdr:
         return hdr.strip()
-    if hasattr(request, "session"):
-        ses = request.session.get("tenant_id") or request.session.get(TENANT_COOKIE_KEY)
+    session = existing_session(request)
+    if session is not None:
+        ses = session.get("tenant_id") or session.get(TENANT_COOKIE_KEY)
         if ses:
             return str(ses).strip()
-    host = request.get_host().split(":", 1)[0]
-    match = _subdomain_re().match(host)
-    if match:
-        return match.group("tenant")
+    tenant = match_tenant_subdomain(request_host(request))
+    if tenant:
+        return tenant
     return getattr(settings, "DEFAULT_TENANT", None)
 
 
@@ -101,11 +107,67 @@ def _logout_endpoint(base_url: str, realm: str) -> str:
     return f"{base_url.rstrip('/')}/realms/{realm}/protocol/openid-connect/logout"
 
 
+def _keycloak_http():
+    """
+    Session ``requests`` partagée vers Keycloak, créée au premier login.
+
+    Les connexions restent en keep-alive dans le pool : les logins suivants
+    évitent la poignée de main TCP + TLS vers le endpoint token.
+    """
+    global _KC_HTTP
+    if _KC_HTTP is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20)
+        http.mount("https://", adapter)
+        http.mount("http://", adapter)
+        _KC_HTTP = http
+    return _KC_HTTP
+
+
+def _get_or_create_login_user(username: str, realm: str, defaults: dict):
+    """
+    Renvoie ``(user, created)`` pour un login SSO.
+
+    Sur un re-login récent, le pk est lu depuis ``_USER_ID_CACHE`` et l'user
+    rechargé par clé primaire avec les seules colonnes utiles ; sinon on
+    passe par ``get_or_create`` et on alimente le cache.
+    """
+    key = (username, realm)
+    with _USER_ID_LOCK:
+        pk = _USER_ID_CACHE.get(key)
+    if pk is not None:
+        try:
+            return User.objects.only(*_LOGIN_USER_FIELDS).get(pk=pk), False
+        except User.DoesNotExist:
+            with _USER_ID_LOCK:
+                _USER_ID_CACHE.pop(key, None)
+
+    user, created = User.objects.get_or_create(username=username, defaults=defaults)
+    with _USER_ID_LOCK:
+        _USER_ID_CACHE[key] = user.pk
+    return user, created
+
+
+def _unverified_claims(token: str) -> dict:
+    from jose import jwt as jose_jwt
+
+    try:
+        return jose_jwt.get_unverified_claims(token)
+    except Exception:  # noqa: BLE001
+        return {}
+
+
 def _parse_body(request: HttpRequest) -> dict:
     if request.POST:
         return request.POST.dict()
+    body = request.body
+    if not body:
+        return {}
     try:
-        return json.loads(request.body or "{}")
+        return orjson.loads(body)
     except Exception:  # noqa: BLE001
         return {}
 
@@ -122,6 +184,12 @@ def keycloak_direct_login(request: HttpRequest):
     À utiliser pour des clients qui ne peuvent pas faire d'Authorization Code.
     En production, **préférer** ``/oidc/authenticate/`` (mozilla-django-oidc).
     """
+    # Imports différés : la plupart des workers ne passent jamais par ce flow,
+    # inutile de charger requests / python-jose au démarrage.
+    import requests
+
+    from hr.auth_utils import ensure_seat_for_user, sync_user_profile
+
     data = _parse_body(request)
     username = (data.get("username") or "").strip()
     password = (data.get("password") or "").strip()
@@ -170,7 +238,9 @@ def keycloak_direct_login(request: HttpRequest):
         form["client_secret"] = settings.KEYCLOAK_CLIENT_SECRET
 
     try:
-        resp = requests.post(_token_endpoint(kc_base, realm), data=form, timeout=12)
+        resp = _keycloak_http().post(
+            _token_endpoint(kc_base, realm), data=form, timeout=KEYCLOAK_HTTP_TIMEOUT,
+        )
     except requests.RequestException as exc:
         logger.warning("Keycloak injoignable : %s", exc)
         return JsonResponse(
@@ -190,7 +260,10 @@ def keycloak_direct_login(request: HttpRequest):
             status=401,
         )
 
-    tokens = resp.json()
+    try:
+        tokens = orjson.loads(resp.content)
+    except Exception:  # noqa: BLE001
+        tokens = {}
     access_token = tokens.get("access_token")
     id_token = tokens.get("id_token")
     if not access_token:
@@ -199,39 +272,30 @@ def keycloak_direct_login(request: HttpRequest):
             status=502,
         )
 
-    # Lecture des claims (signature non vérifiée ici — vérification déjà faite par KC)
-    claims = {}
-    try:
-        if id_token:
-            claims = jose_jwt.get_unverified_claims(id_token)
-    except Exception:  # noqa: BLE001
-        claims = {}
-    access_claims = {}
-    try:
-        access_claims = jose_jwt.get_unverified_claims(access_token)
-    except Exception:  # noqa: BLE001
-        pass
+    # Lecture des claims (signature non vérifiée ici — vérification déjà faite par KC).
+    # L'id_token suffit (OIDC garantit ``sub``) ; l'access token n'est décodé
+    # que s'il manque ``sub`` ou les rôles realm.
+    claims = _unverified_claims(id_token) if id_token else {}
+    sub = claims.get("sub")
+    realm_access = claims.get("realm_access")
+    if not sub or realm_access is None:
+        access_claims = _unverified_claims(access_token)
+        sub = sub or access_claims.get("sub")
+        if realm_access is None:
+            realm_access = access_claims.get("realm_access")
+    roles = (realm_access or {}).get("roles", [])
 
     email = claims.get("email") or claims.get("preferred_username") or username
     first = claims.get("given_name") or ""
     last = claims.get("family_name") or ""
 
-    user, _created = User.objects.get_or_create(
-        username=username,
+    user, created = _get_or_create_login_user(
+        username,
+        realm,
         defaults={"email": email, "first_name": first, "last_name": last},
     )
-    update_fields = []
-    if email and user.email != email:
-        user.email = email
-        update_fields.append("email")
-    if first and user.first_name != first:
-        user.first_name = first
-        update_fields.append("first_name")
-    if last and user.last_name != last:
-        user.last_name = last
-        update_fields.append("last_name")
-    if update_fields:
-        user.save(update_fields=update_fields)
+    if not created:
+        sync_user_profile(user, email=email, first_name=first, last_name=last)
 
     # ✅ Vérifie l'appartenance au tenant — refus si pas d'accès.
     if not user.is_superuser:
@@ -254,22 +318,23 @@ def keycloak_direct_login(request: HttpRequest):
                 status=403,
             )
 
-    # Pose la session Django (cookie httponly).
-    request.session["tenant_id"] = str(tenant_obj.id)
-    request.session[TENANT_COOKIE_KEY] = str(tenant_obj.id)
-    request.session[settings.OIDC_SESSION_KEY] = {
+    # Pose la session Django (cookie httponly). ``dj_login`` marque de toute
+    # façon la session modifiée (clés d'auth, cycle_key) : elle est écrite.
+    session = request.session
+    tenant_id = tenant_obj.id_str
+    session["tenant_id"] = tenant_id
+    session[TENANT_COOKIE_KEY] = tenant_id
+    session[settings.OIDC_SESSION_KEY] = {
         "realm": realm,
         "id_token": id_token,
         "preferred_username": claims.get("preferred_username", username),
         "email": email,
-        "roles": (access_claims.get("realm_access", {}) or {}).get("roles", []),
+        "roles": roles,
     }
-    request.session.modified = True
 
     user.backend = "django.contrib.auth.backends.ModelBackend"
     dj_login(request, user)
 
-    sub = access_claims.get("sub") or claims.get("sub")
     if sub:
         try:
             ensure_seat_for_user(tenant_obj, "rh", sub, user.email)
@@ -280,7 +345,7 @@ def keycloak_direct_login(request: HttpRequest):
         {
             "ok": True,
             "redirect": next_url,
-            "tenant": {"id": str(tenant_obj.id), "slug": tenant_obj.slug},
+            "tenant": {"id": tenant_obj.id_str, "slug": tenant_obj.slug},
             "user": {"username": user.username, "email": user.email},
         }
     )
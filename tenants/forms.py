@@ -17,15 +17,18 @@ class TenantAuthenticationForm(AuthenticationForm):
         Appelé après l’auth. Ici tu peux vérifier que l’utilisateur a accès au tenant,
         plan actif, statut, etc. Ex:
         """
-        tenant_id = self.cleaned_data.get("tenant_id")
+        tenant_id = self.tenant_id  # posé par clean() avant l'authentification
         # TODO: vérifier l’accès du user au tenant_id (requête sur ton modèle TenantUser)
         # if not user.has_access_to(tenant_id): raise forms.ValidationError("Accès refusé", code="inactive")
         super().confirm_login_allowed(user)
 
     def clean(self):
-        cleaned = super().clean()  # appelle authenticate(username, password)
+        # Les champs sont déjà nettoyés (clean_<field>) : on lit une seule fois
+        # avant que AuthenticationForm.clean() n'appelle authenticate() puis
+        # confirm_login_allowed().
+        cd = self.cleaned_data
+        self.tenant_id = cd.get("tenant_id")
+        self.remember_me_value = cd.get("remember_me")
         # Enregistrer le tenant dans la session via la vue (on ne l’a pas ici)
         # On place juste la valeur pour que la vue puisse la lire ensuite.
-        self.tenant_id = self.cleaned_data.get("tenant_id")
-        self.remember_me_value = self.cleaned_data.get("remember_me")
-        return cleaned
+        return super().clean()  # appelle authenticate(username, password)
@@ -5,11 +5,17 @@ Un SEUL middleware (``TenantMiddleware``) résout le tenant courant pour chaque
 requête. La résolution est déléguée à ``Lyneerp.core.tenant.resolve_tenant_from_request``
 afin de garder la logique factorisée.
 
+La résolution n'a lieu qu'une fois : une fois ``request.tenant`` posé (même à
+``None``), les appels ultérieurs à ``resolve_tenant_from_request`` (permissions,
+``TenantQuerySet.for_request``, viewsets) le réutilisent sans refaire la chaîne
+header → session → host → … ni les requêtes SQL associées.
+
 Comportements clés :
 
 - Si on trouve un tenant : on attache ``request.tenant`` (instance) et
-  ``request.tenant_id`` (UUID stringifié), on synchronise la session, et on
-  pose ``HTTP_X_TENANT_ID`` pour les viewsets DRF.
+  ``request.tenant_id`` (UUID stringifié), on synchronise la session si le
+  client en a une (sans écriture si la valeur n'a pas changé), et on pose
+  ``HTTP_X_TENANT_ID`` pour les viewsets DRF.
 - Si on n'en trouve pas et que la requête vise ``/api/``, on retourne 403 JSON
   avec un code d'erreur stable. Pour les autres requêtes, on laisse passer
   (``request.tenant = None``) afin que les vues de login / OIDC / static
@@ -25,7 +31,13 @@ from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import render
 
-from Lyneerp.core.tenant import resolve_tenant_from_request
+from Lyneerp.core.tenant import (
+    TENANT_HEADER,
+    TENANT_SESSION_KEY,
+    existing_session,
+    request_host,
+    resolve_tenant_from_request,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -60,21 +72,27 @@ class TenantMiddleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
-        self.session_key = getattr(settings, "TENANT_SESSION_KEY", "current_tenant")
 
     def __call__(self, request):
         tenant = resolve_tenant_from_request(request)
+        tenant_id = tenant.id_str if tenant else None
         request.tenant = tenant
-        request.tenant_id = str(tenant.id) if tenant else None
+        request.tenant_id = tenant_id
 
         if tenant is not None:
-            # Synchronise la session pour les requêtes suivantes.
-            if hasattr(request, "session"):
-                request.session[self.session_key] = request.tenant_id
+            # Synchronise la session pour les requêtes suivantes — seulement si
+            # le client en a déjà une : un appel API stateless (X-Tenant-Id,
+            # Bearer) ne doit ni charger ni créer de session côté serveur.
+            # Et seulement si la valeur change : une affectation marque la
+            # session modifiée et coûte une écriture du backend en fin de requête.
+            session = existing_session(request)
+            if session is not None and session.get(TENANT_SESSION_KEY) != tenant_id:
+                session[TENANT_SESSION_KEY] = tenant_id
 
             # Permet à DRF & permissions de s'appuyer sur le header.
-            if "HTTP_X_TENANT_ID" not in request.META:
-                request.META["HTTP_X_TENANT_ID"] = request.tenant_id
+            meta = request.META
+            if TENANT_HEADER not in meta:
+                meta[TENANT_HEADER] = tenant_id
         else:
             # Bloque les requêtes API sans tenant — on évite tout fall-through silencieux.
             path = getattr(request, "path", "") or ""
@@ -85,7 +103,7 @@ class TenantMiddleware:
                 logger.info(
                     "[TenantMiddleware] Tenant introuvable pour API path=%s host=%s user=%s",
                     path,
-                    request.get_host() if hasattr(request, "get_host") else "?",
+                    request_host(request) or "?",
                     getattr(user, "email", user),
                 )
                 return JsonResponse(
@@ -1,13 +1,27 @@
 # tenants/models.py
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 import uuid
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
 
+class TenantQuerySet(models.QuerySet):
+    def with_stats(self):
+        """
+        Annote le nombre de membres actifs (une seule requête pour une liste
+        de tenants, au lieu d'un COUNT par ligne via ``active_users_count``).
+        """
+        return self.annotate(
+            _active_users_count=Count("tenant_users", filter=Q(tenant_users__is_active=True)),
+        )
+
+
 class Tenant(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -66,6 +80,8 @@ class Tenant(models.Model):
     ]
     plan_type = models.CharField(max_length=20, choices=PLAN_TYPES, default='STARTER')
 
+    objects = TenantQuerySet.as_manager()
+
     class Meta:
         db_table = 'tenants'
         verbose_name = "Organisation"
@@ -79,12 +95,22 @@ class Tenant(models.Model):
     def __str__(self):
         return f"{self.name} ({self.slug})"
 
-    @property
-    def is_in_trial(self):
-        return bool(self.trial_ends_at and timezone.now() < self.trial_ends_at)
+    @cached_property
+    def id_str(self):
+        """UUID stringifié, calculé une fois par instance (conservé en cache)."""
+        return str(self.id)
+
+    def is_in_trial(self, now=None):
+        """Essai en cours à ``now`` (défaut : maintenant)."""
+        now = now or timezone.now()
+        return bool(self.trial_ends_at and now < self.trial_ends_at)
 
     @property
     def active_users_count(self):
+        # Valeur annotée par ``Tenant.objects.with_stats()`` si disponible.
+        annotated = getattr(self, "_active_users_count", None)
+        if annotated is not None:
+            return annotated
         return self.tenant_users.filter(is_active=True).count()
 
     # ✅ Helpers utiles pour documents
@@ -131,7 +157,10 @@ class TenantUser(models.Model):
         default='MEMBER'
     )
 
-    # Services activés pour cet utilisateur
+    # Services activés pour cet utilisateur (affichage / préférences).
+    # Reste un JSONField : DB_ENGINE=sqlite est supporté hors production, et
+    # le contrôle d'accès passe par les licences (SeatAssignment), jamais par
+    # un filtre sur ce champ.
     enabled_services = models.JSONField(
         default=list,
         blank=True,
@@ -160,7 +189,14 @@ class TenantUser(models.Model):
         indexes = [
             models.Index(fields=['tenant', 'user']),
             models.Index(fields=['role']),
-            models.Index(fields=['is_active']),
+            # Index partiel : seuls les membres actifs sont comptés/filtrés
+            # (active_users_count, with_stats), inutile d'indexer les autres ;
+            # ``is_active`` est déjà fixé par la condition, hors clé.
+            models.Index(
+                fields=['tenant'],
+                name='tu_tenant_active_idx',
+                condition=Q(is_active=True),
+            ),
         ]
 
     def __str__(self):
@@ -203,8 +239,12 @@ class TenantDomain(models.Model):
 
     def clean(self):
         """
-        Sécurise côté application (utile si backend sans contraintes partielles).
-        Empêche d'avoir >1 domaine primaire pour le même tenant.
+        Message d'erreur lisible pour les formulaires (admin, ModelForm) :
+        empêche d'avoir >1 domaine primaire pour le même tenant.
+
+        N'est pas rejoué par ``save()`` : en écriture programmatique, c'est la
+        contrainte partielle ``uniq_primary_domain_per_tenant`` qui garantit
+        l'invariant (``IntegrityError``), sans SELECT supplémentaire.
         """
         from django.core.exceptions import ValidationError
         if self.is_primary:
@@ -214,10 +254,6 @@ class TenantDomain(models.Model):
             if qs.exists():
                 raise ValidationError({"is_primary": "Un seul domaine primaire est autorisé par tenant."})
 
-    def save(self, *args, **kwargs):
-        self.full_clean()  # applique clean() avant save
-        return super().save(*args, **kwargs)
-
 
 class TenantService(models.Model):
 
@@ -280,17 +316,18 @@ class TenantService(models.Model):
     def __str__(self):
         return f"{self.tenant.name} - {self.get_service_display()} ({self.license_type})"
 
-    @property
-    def is_expired(self):
+    # Méthodes et non propriétés : toujours évaluées sur les dates courantes
+    # de l'instance ; ``now`` permet de partager une seule horloge par ligne
+    # (listes admin).
+    def is_expired(self, now=None):
         if not self.expires_at:
             return False
-        return timezone.now() > self.expires_at
+        return (now or timezone.now()) > self.expires_at
 
-    @property
-    def days_until_expiry(self):
+    def days_until_expiry(self, now=None):
         if not self.expires_at:
             return None
-        delta = self.expires_at - timezone.now()
+        delta = self.expires_at - (now or timezone.now())
         return delta.days
 
 
@@ -367,9 +404,8 @@ class TenantInvitation(models.Model):
     def __str__(self):
         return f"Invitation {self.email} - {self.tenant.name}"
 
-    @property
-    def is_expired(self):
-        return timezone.now() > self.expires_at
+    def is_expired(self, now=None):
+        return (now or timezone.now()) > self.expires_at
 
     @property
     def full_name(self):
@@ -485,6 +521,9 @@ class TenantActivityLog(models.Model):
         verbose_name = 'Log d\'activité Tenant'
         verbose_name_plural = 'Logs d\'activité Tenants'
         indexes = [
+            # B-tree composite (pas de BRIN) : sert directement « derniers
+            # logs d'un tenant » (filtre + tri + LIMIT), et reste portable
+            # sur SQLite (tests, DB_ENGINE=sqlite).
             models.Index(fields=['tenant', 'created_at']),
             models.Index(fields=['action']),
             models.Index(fields=['user']),
@@ -554,6 +593,26 @@ class TenantSubscription(models.Model):
         indexes = [models.Index(fields=["tenant", "service", "started_at"]), ]
 
 
+class LicenseQuerySet(models.QuerySet):
+    def with_seat_usage(self):
+        """
+        Annote le nombre de sièges actifs de chaque licence, compté comme
+        partout ailleurs par (tenant, module) : une seule requête pour une
+        liste de licences au lieu d'un COUNT par ligne.
+        """
+        active_seats = (
+            SeatAssignment.objects
+            .filter(tenant=OuterRef("tenant"), module=OuterRef("module"), active=True)
+            .order_by()
+            .values("tenant")
+            .annotate(c=Count("pk"))
+            .values("c")
+        )
+        return self.annotate(
+            _used_seats=Coalesce(Subquery(active_seats, output_field=IntegerField()), 0),
+        )
+
+
 class License(models.Model):
   # Ajout d'un ID
     tenant = models.ForeignKey(
@@ -571,6 +630,8 @@ class License(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LicenseQuerySet.as_manager()
+
     class Meta:
         db_table = 'licenses'
         verbose_name = 'Licence'
@@ -585,16 +646,25 @@ class License(models.Model):
     def __str__(self):
         return f"{self.tenant.name} - {self.module} ({self.plan})"
 
+    def is_valid(self, today=None):
+        """Vérifie si la licence est active et non expirée (à ``today``)."""
+        return self.active and self.valid_until >= (today or timezone.now().date())
+
     @property
-    def is_valid(self):
-        """Vérifie si la licence est active et non expirée"""
-        return self.active and self.valid_until >= timezone.now().date()
+    def used_seats(self):
+        """Sièges actifs sur (tenant, module)."""
+        # Valeur annotée par ``License.objects.with_seat_usage()`` si disponible.
+        annotated = getattr(self, "_used_seats", None)
+        if annotated is not None:
+            return annotated
+        return SeatAssignment.objects.filter(
+            tenant_id=self.tenant_id, module=self.module, active=True
+        ).count()
 
     @property
     def available_seats(self):
         """Nombre de sièges disponibles"""
-        assigned_count = self.seat_assignments.filter(active=True).count()
-        return max(0, self.seats - assigned_count)
+        return max(0, self.seats - self.used_seats)
 
     @property
     def is_fully_utilized(self):
@@ -631,7 +701,13 @@ class SeatAssignment(models.Model):
         indexes = [
             models.Index(fields=['tenant', 'module']),
             models.Index(fields=['user_sub']),
-            models.Index(fields=['active']),
+            # Comptage des sièges occupés (tenant, module, active=True) : les
+            # attributions désactivées s'accumulent, on ne les indexe pas.
+            models.Index(
+                fields=['tenant', 'module'],
+                name='seat_active_idx',
+                condition=Q(active=True),
+            ),
         ]
 
     def __str__(self):
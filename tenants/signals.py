@@ -0,0 +1,34 @@
+"""Signaux Tenant → invalidation du cache de résolution (``Lyneerp.core.tenant``)."""
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from Lyneerp.core.tenant import invalidate_tenant_cache, invalidate_tenants_cache
+from tenants.models import Tenant
+
+
+@receiver(pre_save, sender=Tenant)
+def on_tenant_saving(sender, instance: Tenant, raw=False, **kwargs):
+    # Slug / domaine avant modification : après un renommage, les anciennes
+    # clés de cache résoudraient encore vers ce tenant jusqu'à leur TTL.
+    instance._previous_cache_idents = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_cache_idents = (
+        Tenant.objects.filter(pk=instance.pk).values_list("pk", "slug", "domain").first()
+    )
+
+
+@receiver(post_save, sender=Tenant)
+def on_tenant_saved(sender, instance: Tenant, **kwargs):
+    rows = [(instance.pk, instance.slug, instance.domain)]
+    previous = getattr(instance, "_previous_cache_idents", None)
+    if previous is not None and previous != rows[0]:
+        rows.append(previous)
+    invalidate_tenants_cache(rows)
+
+
+@receiver(post_delete, sender=Tenant)
+def on_tenant_deleted(sender, instance: Tenant, **kwargs):
+    invalidate_tenant_cache(instance)
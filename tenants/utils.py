@@ -11,7 +11,10 @@ from __future__ import annotations
 from typing import Optional
 
 from Lyneerp.core.tenant import (
+    existing_session,  # noqa: F401  (ré-export)
     infer_tenant_from_host as _infer_tenant_from_host,
+    match_tenant_subdomain,  # noqa: F401  (ré-export)
+    request_host,  # noqa: F401  (ré-export)
     resolve_tenant as _resolve_tenant,
     resolve_tenant_from_request as _resolve_from_request,
 )
@@ -4,6 +4,7 @@ from django.contrib.auth.views import LoginView
 from django.shortcuts import render
 
 from tenants.forms import TenantAuthenticationForm
+from tenants.utils import resolve_tenant
 
 
 # Create your views here.
@@ -12,21 +13,26 @@ from tenants.forms import TenantAuthenticationForm
 class TenantLoginView(LoginView):
     authentication_form = TenantAuthenticationForm
 
+    # Lus une fois au chargement ; valeurs immuables partagées par les requêtes.
+    SESSION_KEY = getattr(settings, "TENANT_SESSION_KEY", "current_tenant")
+    REMEMBER_AGE = getattr(settings, "REMEMBER_ME_SESSION_AGE", 60 * 60 * 24 * 30)
+
     def form_valid(self, form):
         # Auth OK -> login
         user = form.get_user()
         login(self.request, user)
 
-        # Stocker le tenant en session pour l’appli
-        tenant_key = getattr(settings, "TENANT_SESSION_KEY", "current_tenant")
-        self.request.session[tenant_key] = getattr(form, "tenant_id", None)
+        # Stocker le tenant en session pour l’appli — sous forme d'UUID : les
+        # requêtes suivantes passent alors directement par la clé primaire au
+        # lieu de re-deviner slug / domaine à partir de la saisie.
+        submitted = getattr(form, "tenant_id", None)
+        tenant = resolve_tenant(submitted)
+        self.request.session[self.SESSION_KEY] = tenant.id_str if tenant else submitted
 
         # Remember me
         remember = getattr(form, "remember_me_value", False)
         if remember:
-            self.request.session.set_expiry(
-                getattr(settings, "REMEMBER_ME_SESSION_AGE", 60 * 60 * 24 * 30)
-            )
+            self.request.session.set_expiry(self.REMEMBER_AGE)
         else:
             # expire à la fermeture du navigateur
             self.request.session.set_expiry(0)
@@ -7,12 +7,30 @@ from datetime import date, timedelta
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
+from Lyneerp.core import tenant as tenant_module
+from tenants import auth_views
 from tenants.models import License, Tenant, TenantUser
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def _clear_tenant_caches():
+    """
+    Repart de caches vides à chaque test : une résolution mise en cache dans
+    un test (puis annulée par le rollback) ne doit pas servir au suivant.
+    """
+    cache.clear()
+    tenant_module._BEARER_HINT_CACHE.clear()
+    auth_views._USER_ID_CACHE.clear()
+    tenant_module._subdomain_match.cache_clear()
+    tenant_module._literal_host_suffix.cache_clear()
+    tenant_module._infer_tenant_from_normalized_host.cache_clear()
+    yield
+
+
 @pytest.fixture
 def tenant_a(db):
     return Tenant.objects.create(
@@ -37,3 +37,32 @@ def test_license_status_expired(client, license_a_expired):
     assert resp.status_code == 200
     body = resp.json()
     assert body["active"] is False
+
+
+def test_license_seat_usage_annotation(license_a_active):
+    from tenants.models import License, SeatAssignment
+
+    SeatAssignment.objects.create(
+        tenant=license_a_active.tenant, license=license_a_active, module="rh",
+        user_sub="sub-1", user_email="a@example.com", active=True,
+    )
+    SeatAssignment.objects.create(
+        tenant=license_a_active.tenant, module="rh",
+        user_sub="sub-2", user_email="b@example.com", active=False,
+    )
+    lic = License.objects.with_seat_usage().get(pk=license_a_active.pk)
+    assert lic.used_seats == 1
+    assert lic.available_seats == 4
+    # Sans annotation : même résultat via COUNT.
+    assert License.objects.get(pk=license_a_active.pk).used_seats == 1
+
+
+def test_license_is_valid_follows_instance_dates(license_a_expired):
+    from datetime import date, timedelta
+
+    lic = license_a_expired
+    assert lic.is_valid() is False
+    lic.valid_until = date.today() + timedelta(days=30)
+    lic.save(update_fields=["valid_until"])
+    assert lic.is_valid() is True
+    assert lic.is_valid(today=date.today() + timedelta(days=31)) is False
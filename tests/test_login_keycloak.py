@@ -6,6 +6,7 @@ ne pas dépendre d'un serveur externe.
 """
 from __future__ import annotations
 
+import json
 from unittest.mock import patch
 
 import pytest
@@ -48,17 +49,17 @@ def test_login_refused_when_user_not_member(client, patch_kc_settings, tenant_b)
     fake_resp_ok = type(
         "R", (), {
             "status_code": 200,
-            "json": lambda self: {
+            "content": json.dumps({
                 "access_token": "abc",
                 "id_token": "def",
                 "refresh_token": "ghi",
-            },
+            }).encode(),
         },
     )()
 
-    with patch("tenants.auth_views.requests.post", return_value=fake_resp_ok), \
+    with patch("requests.Session.post", return_value=fake_resp_ok), \
          patch(
-             "tenants.auth_views.jose_jwt.get_unverified_claims",
+             "jose.jwt.get_unverified_claims",
              return_value={"sub": "kc-1", "email": "intruder@nope.example",
                            "preferred_username": "intruder"},
          ):
@@ -70,3 +71,84 @@ def test_login_refused_when_user_not_member(client, patch_kc_settings, tenant_b)
 
     assert resp.status_code == 403
     assert resp.json()["code"] == "tenant_access_denied"
+
+
+def test_login_user_cache_skips_username_lookup_on_relogin(django_assert_num_queries):
+    from tenants.auth_views import _get_or_create_login_user
+
+    user, created = _get_or_create_login_user("carol", "lyneerp", {"email": "carol@a.example"})
+    assert created is True
+
+    # Re-login : pk lu dans _USER_ID_CACHE, une seule lecture par clé primaire.
+    with django_assert_num_queries(1) as ctx:
+        again, created = _get_or_create_login_user("carol", "lyneerp", {})
+    assert again.pk == user.pk
+    assert created is False
+    assert "username" not in ctx.captured_queries[0]["sql"].split("WHERE", 1)[1]
+
+
+def test_login_user_cache_recovers_from_deleted_user():
+    from django.contrib.auth import get_user_model
+
+    from tenants.auth_views import _get_or_create_login_user
+
+    user, _ = _get_or_create_login_user("dave", "lyneerp", {})
+    user.delete()
+
+    again, created = _get_or_create_login_user("dave", "lyneerp", {})
+    assert created is True
+    assert get_user_model().objects.filter(username="dave").count() == 1
+    # Le cache pointe désormais sur le nouvel utilisateur.
+    assert _get_or_create_login_user("dave", "lyneerp", {}) == (again, False)
+
+
+def test_sync_user_profile_noop_for_freshly_created_user(django_assert_num_queries):
+    from django.contrib.auth import get_user_model
+
+    from hr.auth_utils import sync_user_profile
+
+    claims = {"email": "erin@a.example", "first_name": "Erin", "last_name": "Doe"}
+    user, created = get_user_model().objects.get_or_create(username="erin", defaults=claims)
+    assert created is True
+    with django_assert_num_queries(0):
+        assert sync_user_profile(user, **claims) == {}
+
+
+def test_sync_user_profile_updates_changed_claims_only(django_assert_num_queries):
+    from django.contrib.auth import get_user_model
+
+    from hr.auth_utils import sync_user_profile
+
+    User = get_user_model()
+    user = User.objects.create_user(
+        username="frank", email="old@a.example", first_name="Frank", last_name="Old",
+    )
+    with django_assert_num_queries(1):  # un seul UPDATE ciblé
+        updates = sync_user_profile(
+            user, email="frank@a.example", first_name="Frank", last_name="",
+        )
+    # Claim vide : on ne vide pas le champ existant.
+    assert updates == {"email": "frank@a.example"}
+    assert user.email == "frank@a.example"
+    fresh = User.objects.get(pk=user.pk)
+    assert (fresh.email, fresh.first_name, fresh.last_name) == ("frank@a.example", "Frank", "Old")
+
+
+def test_tenant_login_view_stores_canonical_tenant_uuid(rf, user_a, tenant_a):
+    from django.contrib.sessions.middleware import SessionMiddleware
+
+    from tenants.views import TenantLoginView
+
+    request = rf.post(
+        "/login/",
+        {"username": "alice", "password": "passw0rd!Secure", "tenant_id": tenant_a.slug},
+    )
+    SessionMiddleware(lambda r: None).process_request(request)
+    view = TenantLoginView()
+    view.setup(request)
+    form = view.get_form()
+    assert form.is_valid(), form.errors
+
+    view.form_valid(form)
+    # Saisie par slug, session en UUID canonique.
+    assert request.session[TenantLoginView.SESSION_KEY] == str(tenant_a.id)
@@ -55,3 +55,66 @@ def test_superuser_bypasses_tenant_filter(client, superuser, tenant_a, tenant_b)
     client.force_login(superuser)
     resp = client.get("/api/rh/employees/", HTTP_X_TENANT_ID=str(tenant_a.id))
     assert resp.status_code in {200, 401}
+
+
+def _run_tenant_middleware(request):
+    from django.http import HttpResponse
+
+    from tenants.middleware import TenantMiddleware
+
+    return TenantMiddleware(lambda r: HttpResponse("ok"))(request)
+
+
+def _session_store():
+    from importlib import import_module
+
+    from django.conf import settings
+
+    return import_module(settings.SESSION_ENGINE).SessionStore()
+
+
+def _request_with_session(rf, session_key=None, **extra):
+    from django.conf import settings
+    from django.contrib.sessions.middleware import SessionMiddleware
+
+    request = rf.get("/dashboard/", **extra)
+    if session_key:
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+    SessionMiddleware(lambda r: None).process_request(request)
+    return request
+
+
+def test_tenant_middleware_leaves_cookieless_session_untouched(rf, tenant_a):
+    request = _request_with_session(rf, HTTP_X_TENANT_ID=tenant_a.slug)
+    assert _run_tenant_middleware(request).status_code == 200
+    assert request.tenant == tenant_a
+    # Appel stateless : la session n'est ni chargée ni créée.
+    assert request.session.accessed is False
+    assert request.session.modified is False
+    assert request.session.session_key is None
+
+
+def test_tenant_middleware_skips_unchanged_session_write(rf, tenant_a):
+    from Lyneerp.core.tenant import TENANT_SESSION_KEY
+
+    store = _session_store()
+    store[TENANT_SESSION_KEY] = str(tenant_a.id)
+    store.save()
+
+    request = _request_with_session(rf, store.session_key, HTTP_X_TENANT_ID=tenant_a.slug)
+    _run_tenant_middleware(request)
+    assert request.session[TENANT_SESSION_KEY] == str(tenant_a.id)
+    assert request.session.modified is False
+
+
+def test_tenant_middleware_writes_changed_session_value(rf, tenant_a, tenant_b):
+    from Lyneerp.core.tenant import TENANT_SESSION_KEY
+
+    store = _session_store()
+    store[TENANT_SESSION_KEY] = str(tenant_b.id)
+    store.save()
+
+    request = _request_with_session(rf, store.session_key, HTTP_X_TENANT_ID=tenant_a.slug)
+    _run_tenant_middleware(request)
+    assert request.session[TENANT_SESSION_KEY] == str(tenant_a.id)
+    assert request.session.modified is True
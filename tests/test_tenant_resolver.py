@@ -3,13 +3,21 @@ Tests unitaires du résolveur de tenant.
 """
 from __future__ import annotations
 
+import time
+
+import jwt
 import pytest
 from django.test import RequestFactory
 
+from Lyneerp.core import tenant as tenant_module
 from Lyneerp.core.tenant import (
+    LYNEERP_SUBDOMAIN_REGEX,
     infer_tenant_from_host,
+    invalidate_tenants_cache,
+    match_tenant_subdomain,
     resolve_tenant,
     resolve_tenant_from_request,
+    token_cache_key,
 )
 
 pytestmark = pytest.mark.django_db
@@ -20,6 +28,42 @@ def test_infer_tenant_from_subdomain(settings):
     assert infer_tenant_from_host("acme.lyneerp.test") == "acme"
 
 
+def test_infer_tenant_lyneerp_fast_path(settings):
+    settings.TENANT_SUBDOMAIN_REGEX = LYNEERP_SUBDOMAIN_REGEX
+    assert infer_tenant_from_host("acme.lyneerp.com") == "acme"
+    assert infer_tenant_from_host("Acme.RH.lyneerp.com:8443") == "acme"
+    assert infer_tenant_from_host("rh.lyneerp.com") == "rh"
+
+
+def test_infer_tenant_accepts_unanchored_lyneerp_pattern(settings):
+    settings.TENANT_SUBDOMAIN_REGEX = LYNEERP_SUBDOMAIN_REGEX.strip("^$")
+    assert infer_tenant_from_host("acme.rh.lyneerp.com") == "acme"
+    # Forme sans ancres : toujours l'hôte entier, pas un simple préfixe.
+    assert match_tenant_subdomain("acme.lyneerp.com.evil.example") is None
+
+
+def test_prefix_only_subdomain_pattern_still_matches(settings):
+    # Motif « préfixe » (ancien défaut) : ``re.match``, pas ``fullmatch``.
+    settings.TENANT_SUBDOMAIN_REGEX = r"^(?P<tenant>[a-z0-9-]+)\."
+    assert match_tenant_subdomain("acme.example.com") == "acme"
+    settings.TENANT_SUBDOMAIN_REGEX = r"(?P<tenant>[a-z0-9-]+)\.erp\."
+    assert match_tenant_subdomain("acme.erp.example.com") == "acme"
+    assert match_tenant_subdomain("acme.crm.example.com") is None
+
+
+def test_literal_suffix_pattern_without_regex(settings, monkeypatch):
+    settings.TENANT_SUBDOMAIN_REGEX = r"^(?P<tenant>[a-z0-9-]+)\.lyneerp\.test$"
+
+    def _no_regex(pattern):
+        raise AssertionError("regex compilée pour un motif à suffixe littéral")
+
+    monkeypatch.setattr(tenant_module, "_subdomain_match", _no_regex)
+    assert match_tenant_subdomain("acme-2.lyneerp.test") == "acme-2"
+    assert match_tenant_subdomain("a.b.lyneerp.test") is None
+    assert match_tenant_subdomain("acme.lyneerp.test.evil.com") is None
+    assert match_tenant_subdomain("acme_x.lyneerp.test") is None
+
+
 def test_infer_tenant_skips_localhost():
     assert infer_tenant_from_host("localhost") is None
     assert infer_tenant_from_host("127.0.0.1") is None
@@ -37,6 +81,22 @@ def test_resolve_tenant_by_uuid(tenant_a):
     assert obj.id == tenant_a.id
 
 
+def test_resolve_tenant_by_uuid_hex_and_uppercase(tenant_a):
+    assert resolve_tenant(tenant_a.id.hex).id == tenant_a.id
+    assert resolve_tenant(str(tenant_a.id).upper()).id == tenant_a.id
+    assert resolve_tenant(tenant_a.id.hex.upper()).id == tenant_a.id
+
+
+def test_uuid_forms_share_the_canonical_cache_key(tenant_a):
+    from django.core.cache import cache
+
+    canonical_key = tenant_module.tenant_cache_key(str(tenant_a.id))
+    resolve_tenant(str(tenant_a.id).upper())
+    assert cache.get(canonical_key) == tenant_a
+    assert cache.get(tenant_module.tenant_cache_key(str(tenant_a.id).upper())) is None
+    assert cache.get(tenant_module.tenant_cache_key(tenant_a.id.hex)) is None
+
+
 def test_resolve_tenant_unknown():
     assert resolve_tenant("nope-i-do-not-exist") is None
 
@@ -47,3 +107,155 @@ def test_request_resolution_uses_header(tenant_a):
     obj = resolve_tenant_from_request(req)
     assert obj is not None
     assert obj.id == tenant_a.id
+
+
+def test_request_resolution_uses_slug_header_alias(tenant_a, tenant_b):
+    rf = RequestFactory()
+    req = rf.get("/api/finance/invoices/", HTTP_X_TENANT_SLUG=tenant_a.slug)
+    assert resolve_tenant_from_request(req) == tenant_a
+    # X-Tenant-Id prime sur l'alias X-Tenant-Slug.
+    req = rf.get(
+        "/api/finance/invoices/",
+        HTTP_X_TENANT_ID=tenant_b.slug,
+        HTTP_X_TENANT_SLUG=tenant_a.slug,
+    )
+    assert resolve_tenant_from_request(req) == tenant_b
+
+
+def test_request_resolution_reuses_middleware_result(tenant_a):
+    rf = RequestFactory()
+    req = rf.get("/dashboard/", HTTP_X_TENANT_ID=tenant_a.slug)
+    req.tenant = None  # le middleware n'a rien trouvé
+    assert resolve_tenant_from_request(req) is None
+
+
+def test_request_resolution_resolves_each_identifier_once(monkeypatch, settings):
+    settings.ALLOWED_HOSTS = ["*"]
+    calls = []
+    real_resolve = tenant_module._safe_resolve
+
+    def counting_resolve(ident):
+        calls.append(ident)
+        return real_resolve(ident)
+
+    monkeypatch.setattr(tenant_module, "_safe_resolve", counting_resolve)
+    rf = RequestFactory()
+    # Header et sous-domaine donnent le même identifiant inconnu.
+    req = rf.get("/dashboard/", HTTP_X_TENANT_ID="ghost", HTTP_HOST="ghost.example.com")
+    assert resolve_tenant_from_request(req) is None
+    assert calls.count("ghost") == 1
+
+
+def test_request_resolution_memoised_on_request(monkeypatch):
+    calls = []
+    real_resolve = tenant_module._resolve_from_sources
+
+    def counting_resolve(request):
+        calls.append(request)
+        return real_resolve(request)
+
+    monkeypatch.setattr(tenant_module, "_resolve_from_sources", counting_resolve)
+    req = RequestFactory().get("/dashboard/", HTTP_X_TENANT_ID="ghost")
+    assert resolve_tenant_from_request(req) is None
+    assert resolve_tenant_from_request(req) is None  # « aucun tenant » mémorisé
+    assert len(calls) == 1
+
+
+def test_request_resolution_uses_bearer_tenant_claim(tenant_b):
+    token = jwt.encode(
+        {"sub": "kc-1", "tenant": tenant_b.slug, "exp": int(time.time()) + 60},
+        "not-verified-here",
+        algorithm="HS256",
+    )
+    rf = RequestFactory()
+    for _ in range(2):  # 2e passage : indice servi par le cache
+        req = rf.get("/api/rh/employees/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        obj = resolve_tenant_from_request(req)
+        assert obj is not None
+        assert obj.id == tenant_b.id
+
+
+def test_resolve_tenant_cache_invalidated_on_save(tenant_a, django_capture_on_commit_callbacks):
+    assert resolve_tenant(tenant_a.slug).is_active is True
+    with django_capture_on_commit_callbacks(execute=True):
+        tenant_a.is_active = False
+        tenant_a.save()
+    assert resolve_tenant(tenant_a.slug).is_active is False
+
+
+def test_resolve_tenant_cache_kept_until_commit(tenant_a, django_capture_on_commit_callbacks):
+    assert resolve_tenant(tenant_a.slug).is_active is True
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        tenant_a.is_active = False
+        tenant_a.save()
+    # Pas de commit : la suppression des clés reste en attente.
+    assert len(callbacks) == 1
+    assert resolve_tenant(tenant_a.slug).is_active is True
+
+
+def test_resolve_tenant_old_slug_and_domain_invalidated_on_rename(
+    tenant_a, django_capture_on_commit_callbacks
+):
+    assert resolve_tenant("tenant-a") == tenant_a
+    assert resolve_tenant("a.lyneerp.local") == tenant_a
+    with django_capture_on_commit_callbacks(execute=True):
+        tenant_a.slug = "tenant-a2"
+        tenant_a.domain = "a2.lyneerp.local"
+        tenant_a.save()
+    assert resolve_tenant("tenant-a") is None
+    assert resolve_tenant("a.lyneerp.local") is None
+    assert resolve_tenant("tenant-a2") == tenant_a
+
+
+def test_resolve_tenant_slug_wins_over_other_tenant_domain(tenant_a, tenant_b):
+    tenant_b.domain = tenant_a.slug
+    tenant_b.save()
+    assert resolve_tenant(tenant_a.slug) == tenant_a
+    assert resolve_tenant("a.lyneerp.local") == tenant_a
+
+
+def test_bulk_update_invalidated_in_one_batch(
+    tenant_a, tenant_b, django_capture_on_commit_callbacks
+):
+    from tenants.models import Tenant
+
+    assert resolve_tenant(tenant_a.slug).is_active is True
+    assert resolve_tenant(tenant_b.domain).is_active is True
+    qs = Tenant.objects.filter(pk__in=[tenant_a.pk, tenant_b.pk])
+    idents = list(qs.values_list("pk", "slug", "domain"))
+    with django_capture_on_commit_callbacks(execute=True):
+        qs.update(is_active=False)  # pas de post_save
+        invalidate_tenants_cache(idents)
+    assert resolve_tenant(tenant_a.slug).is_active is False
+    assert resolve_tenant(tenant_b.domain).is_active is False
+
+
+def test_token_cache_key_keeps_non_ascii_characters():
+    assert token_cache_key("abc.d\xe9f.ghi") != token_cache_key("abc.df.ghi")
+
+
+def test_every_identifier_form_stops_resolving_after_deactivate_and_delete(
+    tenant_a, django_capture_on_commit_callbacks
+):
+    forms = [
+        str(tenant_a.id),
+        str(tenant_a.id).upper(),
+        tenant_a.id.hex,
+        tenant_a.id.hex.upper(),
+        f" {tenant_a.slug} ",
+        tenant_a.slug,
+        tenant_a.domain,
+    ]
+    for form in forms:
+        assert resolve_tenant(form).is_active is True
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tenant_a.is_active = False
+        tenant_a.save()
+    for form in forms:
+        assert resolve_tenant(form).is_active is False
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tenant_a.delete()
+    for form in forms:
+        assert resolve_tenant(form) is None